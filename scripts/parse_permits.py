@@ -4,62 +4,91 @@ import os
 import re
 import sys
 import csv
+import operator
+from collections import Counter
+from functools import lru_cache
 
 DEFAULT_INPUTS = ["data/permits_latest.csv", "permits_latest.csv"]
 
+# Accepted spellings of the Permit Type header (after up())
+PERMIT_TYPE_HEADERS = frozenset({"PERMIT TYPE", "PERMIT_TYPE"})
+
 def norm(s: str) -> str:
+    # split()/join collapses any whitespace run and trims, in C, with no regex
     if s is None:
         return ""
-    s = str(s).strip()
-    s = re.sub(r"\s+", " ", s)
-    return s
+    return " ".join(str(s).split())
 
 def up(s: str) -> str:
     return norm(s).upper()
 
+# Simple tiers for quick scanning: (minimum score, tier), highest first
+TIERS = [(85, "A"), (70, "B"), (55, "C"), (0, "D")]
+
 def tier(score: int) -> str:
-    # Simple tiers for quick scanning
-    if score >= 85: return "A"
-    if score >= 70: return "B"
-    if score >= 55: return "C"
-    return "D"
+    for cutoff, t in TIERS:
+        if score >= cutoff:
+            return t
+    return TIERS[-1][1]
+
+# Keywords the rules look for. All of them are found in ONE scan per permit
+# type: the alternation sits inside a zero-width lookahead so overlapping
+# keywords are all reported, and m.lastgroup names the one that hit.
+KEYWORDS = {
+    "DEMOLITION": r"DEMOLITION",
+    "NEW_CONSTRUCTION": r"NEW CONSTRUCTION",
+    "UPFIT": r"UPFIT",
+    "COMMERCIAL": r"COMMERCIAL",
+    "ADDITION": r"ADDITION",
+    "ACCESSORY_STRUCTURE": r"AC(?:CE|E)SSORY STRUCTURE",
+    "SWIMMING_POOL": r"SWIMMING POOL",
+    "EXTERIOR": r"EXTERIOR",
+    "INTERIOR": r"INTERIOR",
+    "ALTER": r"ALTER",
+    "REROOF": r"RE-?ROOF",
+    "MANUFACTURED_HOME": r"MANUFACTURED HOME",
+    "SETUP": r"SET ?UP",
+    "FEASIBILITY": r"FEASIBILITY",
+    "STANDALONE": r"STANDAL",
+}
+KEYWORD_RE = re.compile("(?=(?:" + "|".join(f"(?P<{k}>{p})" for k, p in KEYWORDS.items()) + "))")
+
+# Permit Type rules, checked in priority order (first match wins).
+# A rule matches when every keyword it lists is present, in any order.
+SCORE_RULES = [
+    # Strong indicators
+    ({"DEMOLITION"}, 98, "Demolition = high debris"),
+    ({"NEW_CONSTRUCTION"}, 92, "New construction = high debris"),
+    ({"UPFIT", "COMMERCIAL"}, 86, "Commercial upfit = tear-out debris"),
+    ({"ADDITION"}, 84, "Addition = construction debris"),
+    ({"ACCESSORY_STRUCTURE"}, 76, "Accessory structure = framing/debris"),
+    ({"SWIMMING_POOL"}, 78, "Pool install = excavation/packaging debris"),
+
+    # Medium indicators
+    ({"EXTERIOR", "ALTER"}, 70, "Exterior alteration often creates debris (varies)"),
+    ({"INTERIOR", "ALTER"}, 66, "Interior alteration often creates debris (varies)"),
+    ({"REROOF"}, 60, "Reroof sometimes uses dumpster (contractor-dependent)"),
+    ({"MANUFACTURED_HOME", "SETUP"}, 52, "Manufactured setup may create packaging/debris"),
+
+    # Low value / usually not dumpster-worthy
+    ({"FEASIBILITY"}, 10, "Feasibility = planning, no debris"),
+    ({"STANDALONE"}, 25, "Standalone trade permit often no dumpster"),
+]
 
+# Exports repeat a few dozen distinct permit types across thousands of rows,
+# so each distinct raw value is normalized and run through the rules once.
+@lru_cache(maxsize=None)
 def score_permit_type(pt_raw: str) -> tuple[int, str]:
     """
     Score dumpsters based ONLY on Permit Type (current data reality).
     Returns (0-100 score, reason string).
     """
-    pt = up(pt_raw)
-
-    # Strong indicators
-    if "DEMOLITION" in pt:
-        return 98, "Demolition = high debris"
-    if "NEW CONSTRUCTION" in pt:
-        return 92, "New construction = high debris"
-    if "COMMERCIAL INTERIOR UPFIT" in pt or ("UPFIT" in pt and "COMMERCIAL" in pt):
-        return 86, "Commercial upfit = tear-out debris"
-    if "ADDITION" in pt:
-        return 84, "Addition = construction debris"
-    if "ACCESSORY STRUCTURE" in pt or "ACESSORY STRUCTURE" in pt:
-        return 76, "Accessory structure = framing/debris"
-    if "SWIMMING POOL" in pt:
-        return 78, "Pool install = excavation/packaging debris"
+    hits = {m.lastgroup for m in KEYWORD_RE.finditer(up(pt_raw))}
 
-    # Medium indicators
-    if "EXTERIOR" in pt and "ALTER" in pt:
-        return 70, "Exterior alteration often creates debris (varies)"
-    if "INTERIOR" in pt and "ALTER" in pt:
-        return 66, "Interior alteration often creates debris (varies)"
-    if "REROOF" in pt or "RE-ROOF" in pt:
-        return 60, "Reroof sometimes uses dumpster (contractor-dependent)"
-    if "MANUFACTURED HOME" in pt and ("SET UP" in pt or "SETUP" in pt):
-        return 52, "Manufactured setup may create packaging/debris"
-
-    # Low value / usually not dumpster-worthy
-    if "FEASIBILITY" in pt:
-        return 10, "Feasibility = planning, no debris"
-    if "STANDAL" in pt or "STANDALONE" in pt:
-        return 25, "Standalone trade permit often no dumpster"
+    if hits:
+        for needed, score, reason in SCORE_RULES:
+            if needed <= hits:
+                return score, reason
 
     # Fallback
     return 40, "Unclassified permit type"
@@ -85,58 +114,58 @@ def main():
     os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
 
     with open(inp, "r", encoding="utf-8-sig", newline="") as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
+        reader = csv.reader(f)
+        headers = next(reader, None) or []
+        rows = [r for r in reader if r]
         if not rows:
             raise SystemExit("No rows found in input CSV.")
-        headers = reader.fieldnames or list(rows[0].keys())
 
     # Locate Permit Type column robustly
-    pt_col = None
-    for h in headers:
-        if up(h) in ("PERMIT TYPE", "PERMIT_TYPE"):
-            pt_col = h
+    pt_idx = None
+    for i, h in enumerate(headers):
+        if up(h) in PERMIT_TYPE_HEADERS:
+            pt_idx = i
             break
-    if not pt_col:
+    if pt_idx is None:
         raise SystemExit(f"Could not find 'Permit Type' column. Columns: {headers}")
 
-    # Add new columns
+    # Add new columns (rows are plain lists; score lands at score_idx)
+    ncols = len(headers)
+    score_idx = ncols
     out_rows = []
-    type_counts = {}
-    tier_counts = {"A":0, "B":0, "C":0, "D":0}
 
     for r in rows:
-        pt = r.get(pt_col, "")
+        # Pad/trim ragged rows so the appended columns line up with the header
+        r = r[:ncols] + [""] * (ncols - len(r))
+        pt = r[pt_idx]
         s, reason = score_permit_type(pt)
         t = tier(s)
 
-        type_key = up(pt)
-        type_counts[type_key] = type_counts.get(type_key, 0) + 1
-        tier_counts[t] += 1
+        r += [s, t, reason]
+        out_rows.append(r)
 
-        rr = dict(r)
-        rr["dumpster_score"] = s
-        rr["dumpster_tier"] = t
-        rr["dumpster_reason"] = reason
-        out_rows.append(rr)
+    # Tally in one pass each; tier_counts keeps every tier (even zero) in A-D order
+    type_counts = Counter(up(r[pt_idx]) for r in out_rows)
+    tier_counts = {t: 0 for _, t in TIERS}
+    tier_counts.update(Counter(r[score_idx + 1] for r in out_rows))
 
     # Sort high-to-low for convenience (still includes all)
-    out_rows.sort(key=lambda x: int(x.get("dumpster_score", 0)), reverse=True)
+    out_rows.sort(key=operator.itemgetter(score_idx), reverse=True)
 
     out_headers = headers + ["dumpster_score", "dumpster_tier", "dumpster_reason"]
 
-    with open(args.out, "w", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=out_headers)
-        w.writeheader()
-        for r in out_rows:
-            w.writerow(r)
+    # 1 MiB buffer: the whole scored file goes out in a few large writes
+    with open(args.out, "w", encoding="utf-8", newline="", buffering=1 << 20) as f:
+        w = csv.writer(f)
+        w.writerow(out_headers)
+        w.writerows(out_rows)
 
     # Console summary
     print(f"Input: {inp}")
     print(f"Rows: {len(rows)}")
     print("Tier counts:", tier_counts)
     print("\nPermit Type counts (top):")
-    for k, v in sorted(type_counts.items(), key=lambda kv: kv[1], reverse=True)[:15]:
+    for k, v in type_counts.most_common(15):
         print(f"  {k} -> {v}")
     print(f"\nWrote: {args.out}")
 
@@ -1,11 +1,17 @@
 import os
 import re
+import csv
 import json
+import hashlib
 import asyncio
+import argparse
+import zipfile
+import xml.etree.ElementTree as ET
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
-from playwright.async_api import async_playwright
+from bs4 import BeautifulSoup, Comment
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 
 
 BASE = "https://grvlc-trk.aspgov.com"
@@ -14,30 +20,756 @@ BASE = "https://grvlc-trk.aspgov.com"
 LOGIN_URL = f"{BASE}/eTRAKiT/login.aspx?lt=either&rd=~/Search/permit.aspx"
 PERMIT_SEARCH_URL = f"{BASE}/eTRAKiT/Search/permit.aspx"
 
+# The results grid header row: PERMIT_NO / ISSUED / Permit Type / STATUS / SITE_APN / SITE_ADDR
+RESULT_HEADER_KEYWORDS = ["PERMIT_NO", "ISSUED", "SITE_ADDR"]
 
-def yesterday_mmddyyyy_tz(tz_name: str = "America/New_York") -> str:
+# Runs in the browser. Picks the innermost table whose text contains every keyword
+# (layout tables wrap the grid, so the outer ones match too) and returns its
+# header + body cells, whitespace-collapsed. Rows are read via table.rows so
+# nested tables don't leak in. Fast path anchors on the PERMIT_NO header cell;
+# the full scan computes each table's text once and reuses it for previews.
+EXTRACT_RESULTS_JS = """
+(wanted) => {
+  const norm = (s) => (s || "").replace(/\\s+/g, " ").trim();
+  // Tables are matched on textContent (no layout pass) minus dropdown and
+  // script text, like table_text(): the Search By list spells out the same
+  // keywords as the grid headers. Only the chosen table's cells are read with
+  // innerText, so <br>-split cells keep their word break.
+  const cellText = (c) => norm(c.innerText);
+  const tableText = (t) => {
+    let txt = t.textContent || "";
+    for (const e of t.querySelectorAll("select, script, style")) txt = txt.replace(e.textContent, " ");
+    return txt;
+  };
+  const GRID_CHROME_ROWS = ["rgPager", "rgFilterRow", "rgCommandRow", "rgNoRecords"];
+  const tables = Array.from(document.querySelectorAll("table"));
+  const texts = new Map();
+  const textOf = (t) => {
+    if (!texts.has(t)) texts.set(t, tableText(t));
+    return texts.get(t);
+  };
+  const matches = (t) => {
+    const txt = textOf(t).toUpperCase();
+    return wanted.every((w) => txt.includes(w));
+  };
+
+  let best = null;
+  for (const c of document.querySelectorAll("th, td")) {
+    if (c.textContent.trim().toUpperCase() !== wanted[0]) continue;
+    const t = c.closest("table");
+    if (t && matches(t)) {
+      best = tables.indexOf(t);
+      break;
+    }
+  }
+  if (best === null) {
+    let bestLen = Infinity;
+    tables.forEach((t, i) => {
+      if (matches(t) && textOf(t).length < bestLen) {
+        best = i;
+        bestLen = textOf(t).length;
+      }
+    });
+  }
+  if (best === null) {
+    const previews = tables.slice(0, 25).map((t, i) => ({ i, preview: norm(textOf(t)).slice(0, 240) }));
+    return { index: null, table_count: tables.length, previews };
+  }
+  const trs = Array.from(tables[best].rows).slice(0, 2000)
+    .filter((tr) => !GRID_CHROME_ROWS.some((cls) => tr.classList.contains(cls)));
+  // Header row: the first with <th> cells (else the first row). Blank header
+  // cells (View/select columns) are kept so headers[i] names row[i].
+  const h = Math.max(0, trs.findIndex((tr) => Array.from(tr.cells).some((c) => c.tagName === "TH")));
+  const headers = trs.length ? Array.from(trs[h].cells).map(cellText) : [];
+  const rows = trs.slice(h + 1)
+    .map((tr) => Array.from(tr.cells).filter((c) => c.tagName === "TD").map(cellText))
+    .filter((r) => r.some((c) => c));
+  return { index: best, table_count: tables.length, headers, rows };
+}
+"""
+
+
+# Telerik grid rows that are pager/filter/command chrome or the "No records"
+# placeholder, not data (must match EXTRACT_RESULTS_JS)
+GRID_CHROME_ROWS = frozenset({"rgPager", "rgFilterRow", "rgCommandRow", "rgNoRecords"})
+
+# BeautifulSoup backend for HTML fetched outside the browser (lxml is C, ~10x html.parser)
+HTML_PARSER = "lxml"
+
+# SpreadsheetML namespace used inside .xlsx parts
+XLSX_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+# Columns that identify a permit row for de-duplication (normalized header names)
+FINGERPRINT_COLUMNS = ["PERMIT_NO", "SITE_ADDR", "PERMIT_TYPE"]
+
+# ETRAKIT_DEBUG=1 saves a screenshot + HTML at every step. Otherwise snaps are
+# skipped and only failures leave artifacts (they're never read on success).
+DEBUG = os.getenv("ETRAKIT_DEBUG", "").strip() == "1"
+
+# Saved cookies/localStorage from the last successful login, reused so daily
+# reruns can skip the login form. Kept out of data/ since that folder is
+# uploaded as a workflow artifact.
+SESSION_FILE = os.getenv("ETRAKIT_SESSION_FILE", ".cache/etrakit_session.json")
+
+# Older saved sessions are ignored (ASP.NET auth cookies don't last much longer)
+SESSION_MAX_AGE_S = 24 * 3600
+
+# Set ETRAKIT_HTTP_SEARCH=1 to replay the search form as a plain HTTP POST
+# (sharing the browser's login cookies) instead of driving the search UI.
+# Falls back to the UI if the response doesn't contain the results grid.
+HTTP_SEARCH = os.getenv("ETRAKIT_HTTP_SEARCH", "").strip() == "1"
+
+# Either logged-in marker on the portal header
+LOGGED_IN_RE = re.compile(r"LOGGED IN AS|LOG OUT", re.I)
+
+# Safety cap on result pages followed by either pager (HTTP search or the grid UI)
+MAX_RESULT_PAGES = 50
+
+# Backfill days searched at once. 1 (default) searches them one after another
+# on the logged-in page; above that each day gets its own browser context, but
+# every context carries the same login cookies, i.e. ONE ASP.NET session, which
+# the server serializes and keeps search state in. Keep crawling conservative.
+try:
+    SEARCH_CONCURRENCY = max(int(os.getenv("ETRAKIT_CONCURRENCY", "").strip() or 1), 1)
+except ValueError:
+    SEARCH_CONCURRENCY = 1
+
+# Leading date of an ISSUED cell: 01/02/2025 (optionally with a time) or 2025-01-02
+ISSUED_DATE_RE = re.compile(r"\s*(?:(\d{1,2})/(\d{1,2})/(\d{4})|(\d{4})-(\d{2})-(\d{2}))")
+
+# Matches javascript:__doPostBack('target','argument') in hrefs/onclicks
+POSTBACK_RE = re.compile(r"__doPostBack\('([^']*)','([^']*)'\)")
+
+# Runs in the browser before a search is submitted: tags whatever results
+# (grid header cell or "No records" message) is already on the page, so the
+# readiness check below only fires on content produced by the new search.
+STAMP_RESULTS_JS = """
+(wanted) => {
+  const isHeader = (c) => c.textContent.trim().toUpperCase() === wanted;
+  document.querySelectorAll("th, td").forEach((c) => { if (isHeader(c)) c.dataset.stale = "1"; });
+  document.querySelectorAll("td, div, span").forEach((e) => {
+    if (e.childElementCount === 0 && /no records/i.test(e.textContent)) e.dataset.stale = "1";
+  });
+}
+"""
+
+# True once a fresh (unstamped) grid header or "No records" message exists
+RESULTS_READY_JS = """
+(wanted) => {
+  for (const c of document.querySelectorAll("th, td")) {
+    if (!c.dataset.stale && c.textContent.trim().toUpperCase() === wanted) return true;
+  }
+  for (const e of document.querySelectorAll("td, div, span")) {
+    if (!e.dataset.stale && e.childElementCount === 0 && /no records/i.test(e.textContent)) return true;
+  }
+  return false;
+}
+"""
+
+# Grid "next page" control: Telerik RadGrid pager button, or a classic
+# GridView "Page$Next" link. Shared by the browser and HTTP pagers.
+NEXT_PAGE_SELECTORS = ["input.rgPageNext[name]", "a[href*='Page$Next']"]
+
+# Fires the next-page postback directly: a Page$Next link's own
+# __doPostBack(target, arg) call, or the RadGrid pager button's submit.
+# Returns false when the grid has no pager.
+NEXT_PAGE_JS = """
+(selectors) => {
+  const el = selectors.map((s) => document.querySelector(s)).find((e) => e);
+  if (!el) return false;
+  const m = /__doPostBack\\('([^']*)','([^']*)'\\)/.exec(el.getAttribute("href") || "");
+  if (m && typeof __doPostBack === "function") __doPostBack(m[1], m[2]);
+  else el.click();
+  return true;
+}
+"""
+
+# Resource types the scraper never reads. Aborting them keeps each page load
+# down to the HTML + scripts the WebForms postbacks need.
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+
+# Third-party trackers/beacons: never needed, and they keep connections busy
+BLOCKED_HOSTS_RE = re.compile(
+    r"google-analytics\.com|googletagmanager\.com|doubleclick\.net|facebook\.(?:com|net)"
+    r"|hotjar\.com|segment\.(?:com|io)"
+)
+
+
+def parse_issued(value: str):
+    # (year, month, day) of an ISSUED cell, or None if it isn't a date
+    m = ISSUED_DATE_RE.match(value or "")
+    if not m:
+        return None
+    mo, d, y, iy, im, idd = m.groups()
+    return (int(y), int(mo), int(d)) if y else (int(iy), int(im), int(idd))
+
+
+def issued_column(headers: list):
+    # Index of the ISSUED column ("ISSUED", "Issued Date", "ISSUED_DATE"), or None
+    for i, h in enumerate(map(header_key, headers)):
+        if h == "ISSUED" or h.startswith("ISSUED_"):
+            return i
+    return None
+
+
+def check_issued(issued_date_mmddyyyy: str, found: dict) -> dict:
+    """
+    Raise unless every returned row was issued on the searched day. Guards
+    against a search (or export) answering with another day's results.
+    """
+    if not found["rows"]:
+        return found
+    i = issued_column(found["headers"])
+    if i is None:
+        raise RuntimeError(f"Results for {issued_date_mmddyyyy} have no ISSUED column to verify.")
+    want = parse_issued(issued_date_mmddyyyy)
+    bad = [r[i] if i < len(r) else "" for r in found["rows"]]
+    bad = [v for v in bad if parse_issued(v) != want]
+    if bad:
+        raise RuntimeError(
+            f"{len(bad)} of {len(found['rows'])} rows for {issued_date_mmddyyyy} "
+            f"have another ISSUED date (e.g. {bad[0]!r})."
+        )
+    return found
+
+
+def recent_dates_mmddyyyy_tz(days: int, tz_name: str = "America/New_York") -> list:
+    # Yesterday first, then going back `days` days in total
     now = datetime.now(ZoneInfo(tz_name))
-    y = now - timedelta(days=1)
-    return y.strftime("%m/%d/%Y")
+    return [(now - timedelta(days=d)).strftime("%m/%d/%Y") for d in range(1, days + 1)]
 
 
-async def snap(page, name: str):
-    os.makedirs("data", exist_ok=True)
+async def block_heavy_resources(route):
+    req = route.request
+    if req.resource_type in BLOCKED_RESOURCE_TYPES or BLOCKED_HOSTS_RE.search(req.url):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def save_screenshot(page, name: str, full_page: bool):
+    # JPEG q60 is several times smaller and cheaper to encode than PNG, and
+    # plenty to read a debug capture
     try:
-        await page.screenshot(path=f"data/{name}.png", full_page=True)
+        await page.screenshot(path=f"data/{name}.jpg", type="jpeg", quality=60, full_page=full_page)
     except Exception:
         pass
+
+
+def write_text(path: str, text: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+async def save_html(page, name: str):
     try:
         html = await page.content()
-        with open(f"data/{name}.html", "w", encoding="utf-8") as f:
-            f.write(html)
+        # Disk write off the event loop; concurrent day searches keep running
+        await asyncio.to_thread(write_text, f"data/{name}.html", html)
     except Exception:
         pass
 
 
+async def snap(page, name: str, force: bool = False, full_page: bool = False):
+    if not (DEBUG or force):
+        return
+    os.makedirs("data", exist_ok=True)
+    # Screenshot and DOM dump are independent browser calls; overlap them
+    await asyncio.gather(save_screenshot(page, name, full_page), save_html(page, name))
+
+
+def already_scraped(issued_dates: list) -> bool:
+    """True if data/30_results.json already holds exactly these search dates."""
+    try:
+        with open("data/30_results.json", "r", encoding="utf-8") as f:
+            return json.load(f).get("dates") == issued_dates
+    except (OSError, ValueError, AttributeError):
+        return False
+
+
+def write_json(path: str, obj, compact: bool = False):
+    # Serialize to one string and write it in a single call; ensure_ascii=False
+    # keeps addresses/names readable instead of \uXXXX-escaped.
+    # compact=True drops indentation: pretty-printing puts every cell of every
+    # row on its own line, which roughly doubles a results file.
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if compact:
+        text = json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+    else:
+        text = json.dumps(obj, indent=2, ensure_ascii=False)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def fp(*parts: str, prefix=None) -> str:
+    # Content ID for dedup only (not security-sensitive), so BLAKE2b-128
+    # rather than SHA-256.
+    # Parts are fed one by one rather than joined first; the byte stream (and
+    # so every fingerprint) is the same as hashing "|".join(parts).upper().
+    # `prefix` (from fp_prefix) stands in for leading parts already hashed.
+    h = prefix.copy() if prefix is not None else hashlib.blake2b(digest_size=16)
+    for i, p in enumerate(parts):
+        if i:
+            h.update(b"|")
+        h.update((p or "").upper().encode("utf-8", "ignore"))
+    return h.hexdigest()
+
+
+def fp_prefix(*parts: str):
+    # Hasher state after the leading parts (and their separators) of fp()
+    h = hashlib.blake2b(digest_size=16)
+    for p in parts:
+        h.update((p or "").upper().encode("utf-8", "ignore"))
+        h.update(b"|")
+    return h
+
+
+def header_key(h: str) -> str:
+    # "Permit Type" / "PERMIT_TYPE" -> "PERMIT_TYPE"
+    return h.strip().upper().replace(" ", "_")
+
+
+def permit_key_columns(headers: list) -> list:
+    """
+    Indexes of FINGERPRINT_COLUMNS in `headers`, or [] unless all are present.
+    A partial key could make different permits collide.
+    """
+    col = {}
+    for i, h in enumerate(headers):
+        col.setdefault(header_key(h), i)
+    return [col[c] for c in FINGERPRINT_COLUMNS] if all(c in col for c in FINGERPRINT_COLUMNS) else []
+
+
+def row_fingerprints(issued_date_mmddyyyy: str, headers: list, rows: list) -> list:
+    # `headers` must be positionally aligned with each row (blank headers kept).
+    # Without the full permit key, the whole row is hashed.
+    idx = permit_key_columns(headers)
+    # Every row of a day starts with the same issued date: hash it once and
+    # copy that state per row.
+    day = fp_prefix(issued_date_mmddyyyy)
+    out = []
+    for row in rows:
+        parts = [row[i] if i < len(row) else "" for i in idx] if idx else row
+        out.append(fp(*parts, prefix=day))
+    return out
+
+
+def merge_columns(union: list, headers: list) -> list:
+    """
+    Map a day's columns onto the combined header list `union` (extended in
+    place) by header name, so every cell lands under the header it had.
+    Returns the union index of each of the day's columns. Blank headers never
+    match each other; they each get a column of their own.
+    """
+    keys = [header_key(h) for h in union]
+    taken, idx = set(), []
+    for h in headers:
+        k = header_key(h)
+        j = next((j for j, u in enumerate(keys) if k and u == k and j not in taken), None)
+        if j is None:
+            union.append(h)
+            keys.append(k)
+            j = len(union) - 1
+        taken.add(j)
+        idx.append(j)
+    return idx
+
+
+def write_results(searches: list):
+    """
+    Write every searched day to data/30_results.json.
+    `searches` is [(issued_date_mmddyyyy, {"headers", "rows"}), ...], most recent first.
+    """
+    # Days can come back with different layouts (export vs. grid), so columns
+    # are merged by header name rather than assuming the first day's order.
+    headers, keyed = [], {}
+    for issued, found in searches:
+        day_headers = list(found["headers"])
+        width = max([len(day_headers)] + [len(r) for r in found["rows"]])
+        day_headers += [""] * (width - len(day_headers))
+        idx = merge_columns(headers, day_headers)
+        has_key = bool(permit_key_columns(day_headers))
+        for row, f in zip(found["rows"], row_fingerprints(issued, found["headers"], found["rows"])):
+            merged = [""] * len(headers)
+            for i, cell in enumerate(row):
+                merged[idx[i]] = cell
+            # With the permit key, one row per fingerprint (same permit,
+            # address and type on the same day); otherwise only identical
+            # rows collapse. First occurrence wins; dicts keep order.
+            keyed.setdefault(f if has_key else (issued, tuple(merged)), (merged, f))
+    rows = [r + [""] * (len(headers) - len(r)) for r, _ in keyed.values()]
+    fingerprints = [f for _, f in keyed.values()]
+
+    out = {
+        "date": searches[0][0] if searches else None,
+        "dates": [issued for issued, _ in searches],
+        "headers": headers,
+        "rows": rows,
+        # fingerprints[i] identifies rows[i]
+        "fingerprints": fingerprints,
+    }
+    write_json("data/30_results.json", out, compact=True)
+
+
+def cell_text(el) -> str:
+    return " ".join(el.get_text(" ").split())
+
+
+def table_text(table) -> str:
+    # get_text(" ") minus <select>/<script>/<style> contents: the Search By
+    # dropdown's options spell out the same keywords as the grid headers.
+    return " ".join(
+        s for s in table.find_all(string=True)
+        if not isinstance(s, Comment) and s.find_parent(["select", "script", "style"]) is None
+    )
+
+
+def has_keywords(txt: str) -> bool:
+    txt = txt.upper()
+    return all(w in txt for w in RESULT_HEADER_KEYWORDS)
+
+
+def find_results_table_soup(soup):
+    # Fast path: the table around a th/td cell whose whole text is "PERMIT_NO"
+    # (like EXTRACT_RESULTS_JS) is the innermost candidate, found without
+    # flattening every layout table's text. Only cells count: the same word
+    # as <option> text in the Search By dropdown must not anchor the form.
+    for s in soup.find_all(string=lambda x: x.strip().upper() == RESULT_HEADER_KEYWORDS[0]):
+        cell = s.find_parent(["th", "td"])
+        if cell is None or cell_text(cell).upper() != RESULT_HEADER_KEYWORDS[0]:
+            continue
+        t = cell.find_parent("table")
+        if t is not None and has_keywords(table_text(t)):
+            return t
+
+    # Slow path: smallest table whose text has every keyword
+    best, best_len = None, None
+    for t in soup.find_all("table"):
+        txt = table_text(t)
+        if has_keywords(txt) and (best is None or len(txt) < best_len):
+            best, best_len = t, len(txt)
+    return best
+
+
+def extract_results_from_html(html: str):
+    return extract_results_from_soup(BeautifulSoup(html, HTML_PARSER))
+
+
+def parse_results_page(html: str):
+    # (soup, results) in one call so both can run off the event loop
+    soup = BeautifulSoup(html, HTML_PARSER)
+    return soup, extract_results_from_soup(soup)
+
+
+def extract_results_from_soup(soup):
+    """
+    Python twin of EXTRACT_RESULTS_JS for HTML fetched outside the browser.
+    Returns {"headers", "rows"} for the innermost matching table, or None.
+    """
+    best = find_results_table_soup(soup)
+    if best is None:
+        return None
+
+    # Only this table's own rows, not rows of tables nested inside it
+    trs = [
+        tr for tr in best.find_all("tr")
+        if tr.find_parent("table") is best and not GRID_CHROME_ROWS.intersection(tr.get("class") or ())
+    ][:2000]
+    if not trs:
+        return {"headers": [], "rows": []}
+    # Header row: the first with <th> cells (else the first row). Blank header
+    # cells are kept so headers[i] names row[i].
+    h = next((i for i, tr in enumerate(trs) if tr.find("th", recursive=False)), 0)
+    headers = [cell_text(c) for c in trs[h].find_all(["th", "td"], recursive=False)]
+    rows = []
+    for tr in trs[h + 1:]:
+        row = [cell_text(td) for td in tr.find_all("td", recursive=False)]
+        if any(row):
+            rows.append(row)
+    return {"headers": headers, "rows": rows}
+
+
+def xlsx_col_index(ref: str) -> int:
+    # "C12" -> 2
+    n = 0
+    for ch in ref:
+        if not ch.isalpha():
+            break
+        n = n * 26 + (ord(ch.upper()) - 64)
+    return n - 1
+
+
+def excel_serial_to_mdy(v: str) -> str:
+    try:
+        return (datetime(1899, 12, 30) + timedelta(days=float(v))).strftime("%m/%d/%Y")
+    except ValueError:
+        return v
+
+
+def read_xlsx_rows(path: str) -> list:
+    """First worksheet of an .xlsx as a list of string rows (stdlib only)."""
+    with zipfile.ZipFile(path) as z:
+        names = z.namelist()
+        shared = []
+        if "xl/sharedStrings.xml" in names:
+            for si in ET.fromstring(z.read("xl/sharedStrings.xml")).iter(f"{XLSX_NS}si"):
+                shared.append("".join(t.text or "" for t in si.iter(f"{XLSX_NS}t")))
+        sheets = sorted(n for n in names if n.startswith("xl/worksheets/sheet"))
+        if not sheets:
+            return []
+        root = ET.fromstring(z.read("xl/worksheets/sheet1.xml" if "xl/worksheets/sheet1.xml" in names else sheets[0]))
+
+    rows = []
+    for r in root.iter(f"{XLSX_NS}row"):
+        row = []
+        for c in r.iter(f"{XLSX_NS}c"):
+            idx = xlsx_col_index(c.get("r", "")) if c.get("r") else len(row)
+            t = c.get("t")
+            v = c.find(f"{XLSX_NS}v")
+            if t == "s" and v is not None:
+                val = shared[int(v.text)]
+            elif t == "inlineStr":
+                val = "".join(x.text or "" for x in c.iter(f"{XLSX_NS}t"))
+            else:
+                val = v.text if v is not None and v.text else ""
+            row += [""] * (idx + 1 - len(row))
+            row[idx] = val
+        rows.append(row)
+    return rows
+
+
+def read_export(path: str):
+    """
+    Parse the "Export to Excel" download into {"headers", "rows"}, or None if it
+    doesn't look like the permit results. Portals variously send a real .xlsx,
+    an HTML table saved as .xls, or CSV, so all three are handled.
+    """
+    if zipfile.is_zipfile(path):
+        table = read_xlsx_rows(path)
+    else:
+        with open(path, "r", encoding="utf-8-sig", errors="replace") as f:
+            text = f.read()
+        if text.lstrip().startswith("<"):
+            return extract_results_from_html(text)
+        table = list(csv.reader(text.splitlines()))
+
+    if not table:
+        return None
+    headers = [" ".join(h.split()) for h in table[0]]
+    issued = issued_column(headers)
+    if issued is None or not all(any(w in h.upper() for h in headers) for w in RESULT_HEADER_KEYWORDS):
+        return None
+
+    # Date columns may come through as Excel serial numbers. Match by name
+    # (ISSUED, *DATE, *_DT) so e.g. LAST_UPDATED_BY is left alone.
+    date_cols = [
+        i for i, h in enumerate(map(header_key, headers))
+        if i == issued or h.endswith(("DATE", "_DT"))
+    ]
+    rows = []
+    for r in table[1:]:
+        row = [" ".join(c.split()) for c in r]
+        row += [""] * (len(headers) - len(row))
+        for i in date_cols:
+            if i < len(row) and row[i].replace(".", "", 1).isdigit():
+                row[i] = excel_serial_to_mdy(row[i])
+        if any(row):
+            rows.append(row)
+    # Headers stay unfiltered: rows are padded to this width, so headers[i] names row[i]
+    return {"headers": headers, "rows": rows}
+
+
+async def download_export(page, issued_date_mmddyyyy: str):
+    """Click EXPORT TO EXCEL and parse the file; None if unavailable or unreadable."""
+    try:
+        export = page.locator("text=EXPORT TO EXCEL").first
+        if await export.count() == 0:
+            return None
+        async with page.expect_download(timeout=15000) as dl_info:
+            await export.click()
+        dl = await dl_info.value
+        ext = os.path.splitext(dl.suggested_filename or "")[1] or ".xlsx"
+        # One file per day: searches for different days may run side by side
+        path = f"data/permits_{issued_date_mmddyyyy.replace('/', '')}{ext}"
+        await dl.save_as(path)
+        return await asyncio.to_thread(read_export, path)
+    except Exception:
+        # Not fatal: fall back to scraping the results table
+        return None
+
+
+def form_fields(soup) -> dict:
+    """Current values of every successful control on the page, as the browser would post them."""
+    fields = {}
+    for el in soup.select("input[name]"):
+        typ = (el.get("type") or "text").lower()
+        if typ in ("submit", "button", "image", "reset", "file"):
+            continue
+        if typ in ("checkbox", "radio") and not el.has_attr("checked"):
+            continue
+        fields[el["name"]] = el.get("value", "")
+    for sel in soup.select("select[name]"):
+        opt = sel.select_one("option[selected]") or sel.select_one("option")
+        if opt is not None:
+            fields[sel["name"]] = opt.get("value", opt.get_text())
+    for ta in soup.select("textarea[name]"):
+        fields[ta["name"]] = ta.get_text()
+    return fields
+
+
+def match_option(options: list, value: str, label: str, partial: bool = False):
+    """
+    options is [(value, text), ...]. Exact value match (case-insensitive) wins,
+    else the option whose text is `label` (case-insensitive), or with
+    partial=True the first whose text contains it; None if none match.
+    """
+    for v, _ in options:
+        if v.upper() == value:
+            return v
+    for v, t in options:
+        t = t.strip().lower()
+        if (label in t) if partial else (t == label):
+            return v
+    return None
+
+
+def set_postback(fields: dict, control):
+    """Make `fields` post back as if `control` (a submit input or postback link) was clicked."""
+    if control.name == "input" and control.get("name"):
+        fields[control["name"]] = control.get("value", "")
+        return
+    # Link-style controls post back via __EVENTTARGET (ASP.NET UniqueID =
+    # client id with "_" -> "$" when there's no explicit __doPostBack call).
+    m = POSTBACK_RE.search((control.get("href") or "") + (control.get("onclick") or ""))
+    target, arg = m.groups() if m else (control["id"].replace("_", "$"), "")
+    fields["__EVENTTARGET"] = target
+    fields["__EVENTARGUMENT"] = arg
+
+
+def next_page_control(soup):
+    for sel in NEXT_PAGE_SELECTORS:
+        el = soup.select_one(sel)
+        if el is not None:
+            return el
+    return None
+
+
+def pick_option(select, value: str, label: str, partial: bool = False) -> str:
+    options = [(o.get("value", o.get_text()), o.get_text()) for o in select.find_all("option")]
+    return match_option(options, value, label, partial) or value
+
+
+async def choose_option(select, value: str, label: str, partial: bool = False) -> str:
+    # One round-trip for every option's value + text, instead of one select_option
+    # attempt (which waits out its timeout on a miss) plus per-option reads.
+    options = await select.evaluate("s => Array.from(s.options).map(o => [o.value, o.text])")
+    chosen = match_option(options, value, label, partial)
+    if chosen is None:
+        raise RuntimeError(f"Could not find {value} option in dropdown.")
+    await select.select_option(value=chosen)
+    return chosen
+
+
+async def http_permit_search(context, issued_date_mmddyyyy: str):
+    """
+    Run the ISSUED = <date> search as a form POST through context.request,
+    which shares the logged-in browser cookies but renders nothing.
+    Returns {"headers", "rows"}, or None if anything doesn't look right.
+    """
+    try:
+        # Parsing is CPU-bound and backfill days run concurrently, so build the
+        # soups in a worker thread and keep the event loop free for the others.
+        resp = await context.request.get(PERMIT_SEARCH_URL)
+        soup = await asyncio.to_thread(BeautifulSoup, await resp.text(), HTML_PARSER)
+
+        search_by = soup.select_one("#cplMain_ddSearchBy")
+        oper = soup.select_one("#cplMain_ddSearchOper")
+        val = soup.select_one("#cplMain_txtSearchString")
+        btn = soup.select_one("#ctl00_cplMain_btnSearch")
+        if btn is None or not all(el is not None and el.get("name") for el in (search_by, oper, val)):
+            return None
+
+        fields = form_fields(soup)
+        fields[search_by["name"]] = pick_option(search_by, "ISSUED", "issued", partial=True)
+        fields[oper["name"]] = pick_option(oper, "EQUALS", "equals")
+        fields[val["name"]] = issued_date_mmddyyyy
+
+        set_postback(fields, btn)
+
+        resp = await context.request.post(PERMIT_SEARCH_URL, form=fields)
+        soup, found = await asyncio.to_thread(parse_results_page, await resp.text())
+        if found is None:
+            return None
+
+        # Follow the grid pager with the same kind of postback (each response
+        # carries the fresh __VIEWSTATE). Stop when a page adds nothing new.
+        seen = set(map(tuple, found["rows"]))
+        for _ in range(MAX_RESULT_PAGES - 1):
+            nxt = next_page_control(soup)
+            if nxt is None:
+                break
+            fields = form_fields(soup)
+            set_postback(fields, nxt)
+            resp = await context.request.post(PERMIT_SEARCH_URL, form=fields)
+            soup, page_found = await asyncio.to_thread(parse_results_page, await resp.text())
+            new_rows = [r for r in (page_found or {}).get("rows", []) if tuple(r) not in seen]
+            if not new_rows:
+                break
+            seen.update(map(tuple, new_rows))
+            found["rows"] += new_rows
+        return found
+    except Exception:
+        return None
+
+
+async def wait_all_visible(*locators, timeout: int = 15000):
+    # The controls render together, so wait on them concurrently rather than one by one
+    await asyncio.gather(*(loc.wait_for(state="visible", timeout=timeout) for loc in locators))
+
+
+async def is_logged_in(page) -> bool:
+    # The permit search page shows "LOGGED IN AS: <NAME>" and a LOG OUT link;
+    # one text query covers both markers.
+    return await page.get_by_text(LOGGED_IN_RE).count() > 0
+
+
+def load_session():
+    """
+    The storage_state saved in SESSION_FILE if it is recent and readable,
+    else None (log in normally). A truncated or hand-edited file must not
+    stop new_context() from starting a fresh session.
+    """
+    try:
+        if datetime.now().timestamp() - os.path.getmtime(SESSION_FILE) >= SESSION_MAX_AGE_S:
+            return None
+        with open(SESSION_FILE, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or not isinstance(state.get("cookies"), list):
+        return None
+    return state
+
+
+async def resume_session(page) -> bool:
+    """True if the cookies loaded from SESSION_FILE still give us a logged-in search page."""
+    try:
+        await page.goto(PERMIT_SEARCH_URL, wait_until="domcontentloaded")
+        # An expired session redirects back to the login form
+        if "login.aspx" in page.url.lower():
+            return False
+        return await is_logged_in(page)
+    except Exception:
+        return False
+
+
+async def save_session(context):
+    os.makedirs(os.path.dirname(SESSION_FILE) or ".", exist_ok=True)
+    await context.storage_state(path=SESSION_FILE)
+
+
 async def login_public_portal(page, username: str, password: str):
     await page.goto(LOGIN_URL, wait_until="domcontentloaded")
-    await page.wait_for_timeout(500)
     await snap(page, "00_login_loaded")
 
     # IMPORTANT: Use the *Public Login box in the middle* (cplMain_* ids),
@@ -46,9 +778,7 @@ async def login_public_portal(page, username: str, password: str):
     pw = page.locator("#cplMain_txtPublicPassword")
     btn = page.locator("#cplMain_btnPublicLogin")
 
-    await user.wait_for(state="visible", timeout=15000)
-    await pw.wait_for(state="visible", timeout=15000)
-    await btn.wait_for(state="visible", timeout=15000)
+    await wait_all_visible(user, pw, btn)
 
     await user.fill(username)
     await pw.fill(password)
@@ -57,30 +787,32 @@ async def login_public_portal(page, username: str, password: str):
     async with page.expect_navigation(wait_until="domcontentloaded", timeout=20000):
         await btn.click()
 
-    await page.wait_for_timeout(800)
     await snap(page, "01_after_login")
 
     # Confirm we're actually logged in
     # The permit search page shows "LOGGED IN AS: RIDGE DEVUONO" (from your screenshot).
     # If this doesn't appear, treat as login failure.
-    logged_in_marker = page.locator("text=LOGGED IN AS").first
-    logout_marker = page.locator("text=LOG OUT").first
-
-    if await logged_in_marker.count() == 0 and await logout_marker.count() == 0:
+    if not await is_logged_in(page):
         # Sometimes it lands on a page that still requires redirect; try direct.
         await page.goto(PERMIT_SEARCH_URL, wait_until="domcontentloaded")
-        await page.wait_for_timeout(800)
 
     await snap(page, "02_after_login_or_redirect")
 
-    if await logged_in_marker.count() == 0 and await logout_marker.count() == 0:
+    if not await is_logged_in(page):
         raise RuntimeError("Login did not appear successful (no LOGGED IN AS / LOG OUT found).")
 
 
+def is_search_postback(response) -> bool:
+    # Search postbacks (full or partial) POST back to permit.aspx
+    return response.request.method == "POST" and response.url.lower().startswith(PERMIT_SEARCH_URL.lower())
+
+
 async def run_permit_search(page, issued_date_mmddyyyy: str):
-    # Ensure we're on the permit search page
-    await page.goto(PERMIT_SEARCH_URL, wait_until="domcontentloaded")
-    await page.wait_for_timeout(800)
+    # Ensure we're on the permit search page. Searches post back to the same
+    # page, so a resumed session, or the next day of a sequential backfill on
+    # the same page, just refills the form.
+    if not page.url.lower().startswith(PERMIT_SEARCH_URL.lower()):
+        await page.goto(PERMIT_SEARCH_URL, wait_until="domcontentloaded")
     await snap(page, "10_search_page_loaded")
 
     # These IDs exist on the permit search HTML from your successful logged-in artifact:
@@ -93,172 +825,231 @@ async def run_permit_search(page, issued_date_mmddyyyy: str):
     val = page.locator("#cplMain_txtSearchString")
     btn = page.locator("#ctl00_cplMain_btnSearch")
 
-    await search_by.wait_for(state="visible", timeout=15000)
-    await oper.wait_for(state="visible", timeout=15000)
-    await val.wait_for(state="visible", timeout=15000)
-    await btn.wait_for(state="visible", timeout=15000)
+    await wait_all_visible(search_by, oper, val, btn)
 
     # Select ISSUED in "Search By"
     # Option values on the site are uppercase like ISSUED, PERMIT_NO, etc.
-    # We'll try by value first, then by label fallback.
-    try:
-        await search_by.select_option(value="ISSUED")
-    except Exception:
-        # Fallback: find any option whose label contains "issued"
-        options = await search_by.locator("option").all()
-        chosen = None
-        for opt in options:
-            t = (await opt.text_content()) or ""
-            v = (await opt.get_attribute("value")) or ""
-            if "issued" in t.lower() or v.upper() == "ISSUED":
-                chosen = v
-                break
-        if not chosen:
-            raise RuntimeError("Could not find ISSUED option in Search By dropdown.")
-        await search_by.select_option(value=chosen)
+    # Match by value first, then any label containing "issued".
+    await choose_option(search_by, "ISSUED", "issued", partial=True)
 
-    # Operator stays equals (but enforce it)
-    try:
-        await oper.select_option(value="EQUALS")
-    except Exception:
-        # Fallback by label
-        await oper.select_option(label="Equals")
+    # Operator stays equals (but enforce it). Exact label only: a substring
+    # match would also take "Not Equals".
+    await choose_option(oper, "EQUALS", "equals")
 
     # Fill date
     await val.fill(issued_date_mmddyyyy)
 
     await snap(page, "11_before_search_click")
 
-    # Click search and wait until results area appears
-    await btn.click()
-    await page.wait_for_timeout(1200)
+    # Click search and wait until the results area appears: the grid header
+    # (PERMIT_NO / ISSUED / Permit Type / STATUS / SITE_APN / SITE_ADDR) or a
+    # "No records" message, ignoring whatever a previous search left behind.
+    # Block on the search postback's own response rather than re-scanning the
+    # DOM every frame while the server works; the check then just confirms
+    # the new grid has rendered.
+    await page.evaluate(STAMP_RESULTS_JS, RESULT_HEADER_KEYWORDS[0])
+    try:
+        async with page.expect_response(is_search_postback, timeout=20000):
+            await btn.click()
+    except PlaywrightTimeoutError:
+        pass
+    try:
+        await page.wait_for_function(RESULTS_READY_JS, arg=RESULT_HEADER_KEYWORDS[0], timeout=20000)
+    except Exception:
+        # Not fatal: extraction below reports what the page actually holds
+        pass
     await snap(page, "12_after_search_click")
 
-    # Wait for the results table headers you showed: PERMIT_NO / ISSUED / Permit Type / STATUS / SITE_APN / SITE_ADDR
-    # Sometimes header casing varies; check loosely.
-    await page.wait_for_timeout(800)
-    await snap(page, "13_post_wait")
+    # Preferred: the Excel export has every row in one file (no paging, no DOM walk)
+    found = await download_export(page, issued_date_mmddyyyy)
+    if found is not None:
+        print(f"Export: {len(found['rows'])} rows for {issued_date_mmddyyyy}")
+        return found
 
-    # Try to locate a table that contains PERMIT_NO and ISSUED somewhere near the header row
-    tables = page.locator("table")
-    tcount = await tables.count()
+    # Fallback: locate and read the results table in ONE round-trip: the page scores every
+    # table in-browser and ships back just the winner's cells (or previews on a miss).
+    found = await page.evaluate(EXTRACT_RESULTS_JS, RESULT_HEADER_KEYWORDS)
 
-    def looks_like_header(txt: str) -> bool:
-        txt_u = txt.upper()
-        return ("PERMIT_NO" in txt_u) and ("ISSUED" in txt_u) and ("SITE_ADDR" in txt_u)
+    if found["index"] is None:
+        # Dump a quick report for debugging
+        await snap(page, "20_table_not_found", force=True, full_page=True)
+        report = {"issued_date": issued_date_mmddyyyy, "table_count": found["table_count"], "tables": found["previews"]}
+        write_json("data/20_table_report.json", report)
+        raise RuntimeError("Results table not found after search. See data/20_table_not_found.jpg and data/20_table_report.json")
 
-    found_table_index = None
-    for i in range(tcount):
-        txt = (await tables.nth(i).inner_text()) or ""
-        if looks_like_header(txt):
-            found_table_index = i
-            break
+    found = {"headers": found["headers"], "rows": found["rows"]}
 
-    if found_table_index is None:
-        # Dump a quick report for debugging
-        report = {"issued_date": issued_date_mmddyyyy, "table_count": tcount, "tables": []}
-        for i in range(min(tcount, 25)):
-            txt = (await tables.nth(i).inner_text()) or ""
-            preview = " ".join(txt.split())[:240]
-            report["tables"].append({"i": i, "preview": preview})
-        os.makedirs("data", exist_ok=True)
-        with open("data/20_table_report.json", "w", encoding="utf-8") as f:
-            json.dump(report, f, indent=2)
-        raise RuntimeError("Results table not found after search. See data/12_after_search_click.png and data/20_table_report.json")
-
-    result_table = tables.nth(found_table_index)
-
-    # Extract rows (best-effort)
-    headers = []
-    rows = []
-    try:
-        # Try header cells
-        header_cells = result_table.locator("tr").first.locator("th,td")
-        hc = await header_cells.count()
-        headers = [((await header_cells.nth(j).inner_text()) or "").strip() for j in range(hc)]
-        headers = [h for h in headers if h]
-    except Exception:
-        headers = []
+    await snap(page, "14_results_detected")
 
-    try:
-        tr = result_table.locator("tr")
-        rc = await tr.count()
-        for r in range(1, min(rc, 2000)):  # skip header
-            tds = tr.nth(r).locator("td")
-            c = await tds.count()
-            if c == 0:
-                continue
-            row = [((await tds.nth(j).inner_text()) or "").strip() for j in range(c)]
-            if any(row):
-                rows.append(row)
-    except Exception:
-        pass
+    await follow_result_pages(page, found)
+    return found
 
-    os.makedirs("data", exist_ok=True)
-    with open("data/30_results.json", "w", encoding="utf-8") as f:
-        json.dump({"date": issued_date_mmddyyyy, "headers": headers, "rows": rows}, f, indent=2)
 
-    await snap(page, "14_results_detected")
+async def follow_result_pages(page, found: dict):
+    """
+    Append the rows of every further grid page to `found`, firing the pager
+    postback directly and waiting for the re-rendered grid. Best-effort: the
+    export above is preferred. Stops when there is no pager, the grid does not
+    re-render, or a page adds nothing new (the last page repeats itself).
+    """
+    seen = set(map(tuple, found["rows"]))
+    for n in range(2, MAX_RESULT_PAGES + 1):
+        try:
+            await page.evaluate(STAMP_RESULTS_JS, RESULT_HEADER_KEYWORDS[0])
+            if not await page.evaluate(NEXT_PAGE_JS, NEXT_PAGE_SELECTORS):
+                return
+            await page.wait_for_function(RESULTS_READY_JS, arg=RESULT_HEADER_KEYWORDS[0], timeout=15000)
+            page_found = await page.evaluate(EXTRACT_RESULTS_JS, RESULT_HEADER_KEYWORDS)
+        except Exception:
+            return
+        new_rows = [r for r in page_found.get("rows") or [] if tuple(r) not in seen]
+        if not new_rows:
+            return
+        seen.update(map(tuple, new_rows))
+        found["rows"] += new_rows
+        await snap(page, f"15_page{n}")
+
+
+async def http_search_day(context, issued_date_mmddyyyy: str):
+    # None when ETRAKIT_HTTP_SEARCH is off or the plain POST didn't work out
+    found = await http_permit_search(context, issued_date_mmddyyyy) if HTTP_SEARCH else None
+    if found is not None:
+        print(f"HTTP search: {len(found['rows'])} rows for {issued_date_mmddyyyy}")
+    return found
+
+
+async def search_day(page, issued_date_mmddyyyy: str):
+    found = await http_search_day(page.context, issued_date_mmddyyyy)
+    if found is None:
+        found = await run_permit_search(page, issued_date_mmddyyyy)
+    return check_issued(issued_date_mmddyyyy, found)
 
-    # OPTIONAL: Click "EXPORT TO EXCEL" if present (this is usually the cleanest output)
-    # If it exists, save it as data/permits.xlsx
-    try:
-        export = page.locator("text=EXPORT TO EXCEL").first
-        if await export.count() > 0:
-            async with page.expect_download(timeout=15000) as dl_info:
-                await export.click()
-            dl = await dl_info.value
-            await dl.save_as("data/permits.xlsx")
-    except Exception:
-        # Not fatal
-        pass
 
-    # OPTIONAL: try to click next page once (since you often see 2 pages)
-    # This is best-effort; export-to-excel is preferred.
+async def new_scrape_context(browser, storage_state=None):
+    context = await browser.new_context(
+        viewport={"width": 1400, "height": 900},
+        accept_downloads=True,
+        storage_state=storage_state,
+    )
+    await context.route("**/*", block_heavy_resources)
+    return context
+
+
+async def search_day_in_context(browser, login_context, storage_state: dict, issued_date_mmddyyyy: str, limit, http_lock):
+    async with limit:
+        # The HTTP search only needs the login's cookies; no page to open.
+        # Those requests all share the login context's one ASP.NET session,
+        # so they run strictly one at a time whatever SEARCH_CONCURRENCY is.
+        async with http_lock:
+            found = await http_search_day(login_context, issued_date_mmddyyyy)
+        if found is not None:
+            return check_issued(issued_date_mmddyyyy, found)
+
+        # UI search: a context of its own, seeded with the logged-in cookies,
+        # so its postbacks/ViewState never interleave with another day's.
+        context = await new_scrape_context(browser, storage_state)
+        page = await context.new_page()
+        try:
+            return check_issued(issued_date_mmddyyyy, await run_permit_search(page, issued_date_mmddyyyy))
+        except Exception:
+            await snap(page, f"98_error_{issued_date_mmddyyyy.replace('/', '')}", force=True, full_page=True)
+            raise
+        finally:
+            await context.close()
+
+
+async def scrape_etrakit(browser, issued_dates: list, username: str, password: str) -> tuple:
+    """
+    Log in (or resume the saved session) in a fresh context on `browser` and
+    search every date. Returns a (searches, failed) tuple:
+    ([(issued_date, {"headers", "rows"}), ...], [issued_date of each failed day]).
+    """
+    session = load_session()
+    have_session = session is not None
+    context = await new_scrape_context(browser, session)
+    page = await context.new_page()
+
     try:
-        # common pager patterns: ">" or "Next" links/buttons
-        next_candidates = [
-            page.locator("a[title*='Next' i]").first,
-            page.locator("a:has-text('>')").first,
-            page.locator("button:has-text('>')").first,
-            page.locator("a:has-text('Next')").first,
-        ]
-        for nxt in next_candidates:
-            if await nxt.count() > 0:
-                await nxt.click()
-                await page.wait_for_timeout(1200)
-                await snap(page, "15_page2")
-                break
+        if have_session and await resume_session(page):
+            print("Reusing saved session")
+        else:
+            await login_public_portal(page, username, password)
+            await save_session(context)
+
+        if SEARCH_CONCURRENCY == 1 or len(issued_dates) == 1:
+            # One day after another on the logged-in page: one login, one
+            # ASP.NET session, one search in flight.
+            results = []
+            for issued in issued_dates:
+                try:
+                    results.append(await search_day(page, issued))
+                except Exception as e:
+                    await snap(page, f"98_error_{issued.replace('/', '')}", force=True, full_page=True)
+                    results.append(e)
+            await snap(page, "99_final_state")
+        else:
+            # Backfill fan-out: SEARCH_CONCURRENCY days at a time, each UI
+            # search in a context of its own seeded with this login.
+            state = await context.storage_state()
+            limit, http_lock = asyncio.Semaphore(SEARCH_CONCURRENCY), asyncio.Lock()
+            results = await asyncio.gather(
+                *(search_day_in_context(browser, context, state, issued, limit, http_lock) for issued in issued_dates),
+                return_exceptions=True,
+            )
+        # A failed day doesn't sink the others: they are still written, and
+        # main() then fails the run so the gap gets noticed and backfilled.
+        searches, failed = [], []
+        for issued, res in zip(issued_dates, results):
+            if isinstance(res, BaseException):
+                print(f"Search failed for {issued}: {res}")
+                failed.append(issued)
+            else:
+                searches.append((issued, res))
+        if not searches:
+            raise results[0]
+        return searches, failed
     except Exception:
-        pass
+        await snap(page, "98_error", force=True, full_page=True)
+        raise
+    finally:
+        await context.close()
 
 
 async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=int, default=1, help="Search this many days back from yesterday (backfill)")
+    ap.add_argument("--force", action="store_true", help="Scrape even if these dates are already in data/30_results.json")
+    args = ap.parse_args()
+
+    issued_dates = recent_dates_mmddyyyy_tz(max(args.days, 1), "America/New_York")
+    if not args.force and already_scraped(issued_dates):
+        # Same-day rerun: nothing new to fetch, skip the browser entirely
+        print(f"Already scraped {issued_dates}; use --force to re-run.")
+        return
+
     user = os.getenv("ETRAKIT_USER", "").strip()
     pw = os.getenv("ETRAKIT_PASS", "").strip()
     if not user or not pw:
         raise RuntimeError("Missing ETRAKIT_USER / ETRAKIT_PASS environment variables.")
 
-    issued = yesterday_mmddyyyy_tz("America/New_York")
-
     os.makedirs("data", exist_ok=True)
 
+    # One Chromium per run; each scraper gets its own context off it
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context(
-            viewport={"width": 1400, "height": 900},
-            accept_downloads=True
-        )
-        page = await context.new_page()
-
         try:
-            await login_public_portal(page, user, pw)
-            await run_permit_search(page, issued)
-            await snap(page, "99_final_state")
+            searches, failed = await scrape_etrakit(browser, issued_dates, user, pw)
+            write_results(searches)
         finally:
-            await context.close()
             await browser.close()
 
+    if failed:
+        # Partial results are on disk, but the run must not look green
+        raise RuntimeError(
+            f"Search failed for {', '.join(failed)}; the other days were written. "
+            f"Re-run with --days {args.days} to search them again."
+        )
+
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,142 @@
+import os
+import sys
+import hashlib
+import zipfile
+
+import pytest
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import run_daily as rd  # noqa: E402
+
+
+GRID = """
+<table><tr><td>Search By</td><td><select>
+  <option value="PERMIT_NO">PERMIT_NO</option><option value="ISSUED">ISSUED</option>
+  <option value="SITE_ADDR">SITE_ADDR</option>
+</select></td></tr></table>
+<table class="rgMasterTable">
+  <thead>
+    <tr class="rgCommandRow"><td colspan="4"><a>EXPORT TO EXCEL</a></td></tr>
+    <tr><th></th><th>PERMIT_NO</th><th>ISSUED</th><th>SITE_ADDR</th></tr>
+    <tr class="rgFilterRow"><td></td><td><input></td><td></td><td></td></tr>
+  </thead>
+  <tbody>{body}</tbody>
+</table>
+"""
+
+ROW = '<tr><td><a>View</a></td><td>B25-001</td><td>01/02/2025</td><td>12 MAIN ST<br>GREENVILLE</td></tr>'
+NO_RECORDS = '<tr class="rgNoRecords"><td colspan="4">No records to display.</td></tr>'
+PAGER = '<tr class="rgPager"><td colspan="4">1 2 3</td></tr>'
+
+
+def test_parse_issued():
+    assert rd.parse_issued("1/2/2025") == (2025, 1, 2)
+    assert rd.parse_issued("01/02/2025 10:30 AM") == (2025, 1, 2)
+    assert rd.parse_issued("2025-01-02") == (2025, 1, 2)
+    assert rd.parse_issued("") is None
+    assert rd.parse_issued("No records") is None
+
+
+def test_check_issued():
+    found = {"headers": ["PERMIT_NO", "Issued Date"], "rows": [["B1", "01/02/2025"]]}
+    assert rd.check_issued("01/02/2025", found) is found
+    with pytest.raises(RuntimeError, match="another ISSUED date"):
+        rd.check_issued("01/03/2025", found)
+    with pytest.raises(RuntimeError, match="no ISSUED column"):
+        rd.check_issued("01/02/2025", {"headers": ["EXPORT TO EXCEL"], "rows": [["x"]]})
+    # Nothing to verify on an empty day
+    assert rd.check_issued("01/02/2025", {"headers": [], "rows": []})["rows"] == []
+
+
+def test_issued_column():
+    assert rd.issued_column(["PERMIT_NO", "ISSUED", "SITE_ADDR"]) == 1
+    assert rd.issued_column(["PERMIT_NO", "ISSUED_DATE"]) == 1
+    assert rd.issued_column(["PERMIT_NO", "REISSUED"]) is None
+
+
+def test_extract_results_skips_grid_chrome():
+    found = rd.extract_results_from_html(GRID.format(body=ROW + PAGER))
+    assert found["headers"] == ["", "PERMIT_NO", "ISSUED", "SITE_ADDR"]
+    assert found["rows"] == [["View", "B25-001", "01/02/2025", "12 MAIN ST GREENVILLE"]]
+
+
+def test_extract_results_empty_grid():
+    found = rd.extract_results_from_html(GRID.format(body=NO_RECORDS))
+    assert found == {"headers": ["", "PERMIT_NO", "ISSUED", "SITE_ADDR"], "rows": []}
+    assert rd.check_issued("01/02/2025", found) is found
+
+
+def test_extract_results_ignores_dropdown_only_page():
+    soup = BeautifulSoup(GRID.split('<table class="rgMasterTable">')[0], rd.HTML_PARSER)
+    assert rd.extract_results_from_soup(soup) is None
+
+
+def write_xlsx(path, rows):
+    # Minimal .xlsx: one sheet of inline strings, no sharedStrings part
+    sheet = (
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+        + "".join(
+            "<row>" + "".join(f'<c t="inlineStr"><is><t>{v}</t></is></c>' for v in r) + "</row>"
+            for r in rows
+        )
+        + "</sheetData></worksheet>"
+    )
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("xl/worksheets/sheet1.xml", sheet)
+
+
+def test_read_xlsx_rows(tmp_path):
+    path = tmp_path / "permits.xlsx"
+    write_xlsx(path, [["PERMIT_NO", "ISSUED"], ["B1", "01/02/2025"]])
+    assert rd.read_xlsx_rows(str(path)) == [["PERMIT_NO", "ISSUED"], ["B1", "01/02/2025"]]
+
+
+def test_read_export_csv(tmp_path):
+    path = tmp_path / "permits.csv"
+    path.write_text(
+        "PERMIT_NO,ISSUED_DATE,SITE_ADDR,LAST_UPDATED_BY\n"
+        "B1,45659,12 MAIN ST,1042\n",
+        encoding="utf-8",
+    )
+    found = rd.read_export(str(path))
+    assert found["headers"] == ["PERMIT_NO", "ISSUED_DATE", "SITE_ADDR", "LAST_UPDATED_BY"]
+    # Excel serials become dates only in date columns
+    assert found["rows"] == [["B1", "01/02/2025", "12 MAIN ST", "1042"]]
+    assert rd.check_issued("01/02/2025", found) is found
+
+
+def test_read_export_html_with_command_row(tmp_path):
+    path = tmp_path / "permits.xls"
+    path.write_text(GRID.format(body=ROW), encoding="utf-8")
+    found = rd.read_export(str(path))
+    assert found["headers"] == ["", "PERMIT_NO", "ISSUED", "SITE_ADDR"]
+    assert len(found["rows"]) == 1
+
+
+def test_read_export_rejects_other_sheets(tmp_path):
+    path = tmp_path / "other.csv"
+    path.write_text("NAME,PHONE\nA,1\n", encoding="utf-8")
+    assert rd.read_export(str(path)) is None
+
+
+def test_merge_columns():
+    union = ["PERMIT_NO", "ISSUED", ""]
+    assert rd.merge_columns(union, ["", "Issued", "PERMIT_NO", "STATUS"]) == [3, 1, 0, 4]
+    assert union == ["PERMIT_NO", "ISSUED", "", "", "STATUS"]
+
+
+def test_match_option():
+    options = [("EQUALS", "Equals"), ("NOT_EQUALS", "Not Equals"), ("ISSUED", "Issued Date")]
+    assert rd.match_option(options, "ISSUED", "issued") == "ISSUED"
+    assert rd.match_option(options, "EQ", "equals") == "EQUALS"
+    assert rd.match_option(options, "X", "issued", partial=True) == "ISSUED"
+    assert rd.match_option(options, "X", "issued") is None
+
+
+def test_fp_matches_joined_hash():
+    parts = ("01/02/2025", "b1", None, "12 Main St")
+    joined = "|".join(p or "" for p in parts).upper().encode()
+    assert rd.fp(*parts) == hashlib.blake2b(joined, digest_size=16).hexdigest()
+    assert rd.fp(*parts[2:], prefix=rd.fp_prefix(*parts[:2])) == rd.fp(*parts)